@@ -18,35 +18,48 @@ get pairs to avoid.
 import os
 import sys
 import re
+import copy
 import getpass
 import random
-import smtplib
-import ssl
-import socket
 import logging
+import threading
 
 from io import StringIO
+from contextlib import suppress
+from collections import OrderedDict
 from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 
 from itertools import permutations
 from ruamel.yaml import YAML
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 
 # Constants
 CONFIG_FILE = "global_config.yaml"
 DEFAULT_CONFIG_FILE = "config.yaml"
 DEFAULT_SUBLIST = "test_config"
 
-MAX_ITERATION = 1000
+MAX_YAML_CACHE = 100
+IO_BUFFER_SIZE = 1 << 16  # bytes, the YAML history grows every year
+MAX_ERROR_RATIO = 3  # abort sending past 1/MAX_ERROR_RATIO failed mails
+MAX_SEND_WORKERS = 4
+MAX_MAILS_PER_CONNECTION = 100
+MAX_LOGIN_ATTEMPTS = 5
 FONT_SIZE_TITLE = 24
 FONT_SIZE_TEXT = 15
 
+SECTION_RE = re.compile(r"^[a-zA-Z0-9_-]+:")
+
 yaml = YAML()
 yaml.preserve_quotes = True
 
+# Read-only loads go through libyaml when ruamel.yaml.clib is available
+yaml_safe = YAML(typ="safe")
+
+# Draws are seeded from the OS, so they cannot be replayed from a known seed
+_rng = random.SystemRandom()
+
+# Parsed YAML files, keyed by path and invalidated on (mtime, size) change
+_yaml_cache: OrderedDict = OrderedDict()
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -55,8 +68,15 @@ logging.basicConfig(
 
 def main():
     """Main function of the script."""
+    current_year = datetime.now().year
     global_config = get_global_config()
-    private_config = get_config(global_config["private_folder"])
+
+    config_file = input(
+        f"[Question] - Which config file would you like to use ? [{DEFAULT_CONFIG_FILE}] "
+    )
+    if config_file == "":
+        config_file = DEFAULT_CONFIG_FILE
+    private_config = get_config(global_config["private_folder"], config_file)
 
     # Get peoples from file
     config_sublist = input(
@@ -69,28 +89,27 @@ def main():
         return
 
     # Get the list of people shuffled
-    list_people = get_santas_list(
+    names, emails = get_santas_list(
         global_config["private_folder"],
         config_sublist,
         private_config["year_before_repeat"],
+        current_year,
     )
 
     # Save people order
     output_file = os.path.join(
         global_config["private_folder"], config_sublist, "output_mail_list.yaml"
     )
-    save_people(list_people, output_file)
+    save_people(names, emails, output_file, current_year)
 
     # Generate PDF
     output_pdf = os.path.join(global_config["private_folder"], config_sublist)
-    generate_pdf(
-        output_pdf, list_people, private_config[config_sublist]["mail_subject"]
-    )
+    generate_pdf(output_pdf, names, private_config[config_sublist]["mail_subject"])
 
     # Send mail
     answer = input("[Question] - Would you like to send mail ? [y/N] ")
     if answer.lower() == "y":
-        send_email(list_people, private_config, config_sublist)
+        send_email(names, emails, private_config, config_sublist)
 
 
 def get_global_config() -> dict:
@@ -101,75 +120,117 @@ def get_global_config() -> dict:
         dict: The global configuration loaded from 'global_config.yaml'.
     """
     config_path = os.path.join(os.path.dirname(__file__), CONFIG_FILE)
-    with open(config_path, "r", encoding="utf-8") as config_file:
-        config = yaml.load(config_file)
+    return _load_yaml_cached(config_path)
 
-    return config
 
-
-def get_config(private_folder: str) -> dict:
+def get_config(private_folder: str, config_file: str) -> dict:
     """
-    Prompts the user to select a configuration file from the specified private folder,
-    loads the selected configuration file, and returns its contents as a dictionary.
+    Loads the given configuration file from the specified private folder, and
+    returns its contents as a dictionary.
 
     Args:
         private_folder (str): The path to the folder containing the configuration files.
+        config_file (str): The name of the configuration file to load.
 
     Returns:
         dict: The contents of the selected configuration file.
     """
-    answer = input(
-        f"[Question] - Which config file would you like to use ? [{DEFAULT_CONFIG_FILE}] "
-    )
-    if answer == "":
-        answer = DEFAULT_CONFIG_FILE
+    file_path = os.path.join(private_folder, config_file)
+    return _load_yaml_cached(file_path)
+
+
+def _load_yaml_cached(path: str):
+    """
+    Load a YAML file, reusing the parsed content as long as the file on disk
+    has not changed. Least recently used entries are evicted past
+    MAX_YAML_CACHE files.
+
+    Args:
+        path (str): The path to the YAML file to load.
+
+    Returns:
+        The parsed YAML content, as a copy that callers are free to mutate.
+    """
+    stat = os.stat(path)
+    entry = _yaml_cache.get(path)
+
+    if entry is not None and entry[:2] == (stat.st_mtime, stat.st_size):
+        _yaml_cache.move_to_end(path)
+    else:
+        # libyaml decodes the UTF-8 bytes itself, skip Python's text layer
+        with open(path, "rb", buffering=IO_BUFFER_SIZE) as yaml_file:
+            entry = (stat.st_mtime, stat.st_size, yaml_safe.load(yaml_file))
 
-    file_path = os.path.join(private_folder, answer)
-    with open(file_path, "r", encoding="utf-8") as config_file:
-        config = yaml.load(config_file)
+        _yaml_cache[path] = entry
+        if len(_yaml_cache) > MAX_YAML_CACHE:
+            _yaml_cache.popitem(last=False)
 
-    return config
+    return copy.deepcopy(entry[2])
+
+
+def get_sublist_key(config_sublist: str, year: int) -> str:
+    """
+    Get the key of the people list for the given year in a mail list file.
+
+    Args:
+        config_sublist (str): The sublist to take configuration from.
+        year (int): The year of the list.
+
+    Returns:
+        str: The sublist name for the test sublist, 'year_<year>' otherwise.
+    """
+    return config_sublist if config_sublist == DEFAULT_SUBLIST else f"year_{year}"
 
 
 def get_people(
     private_folder: str,
     people_list: str,
     config_sublist: str,
-    year: str = datetime.now().year,
+    year: int,
 ) -> tuple:
     """
-    Get people from a given input file, return it as a list of tuples.
+    Get people from a given input file, return their names and mails as separate
+    lists, along with the people they should not give to.
 
     Args:
         private_folder (str): The path to the private folder containing the input
                               and output files.
         people_list (str): The name of the file containing the list of people.
         config_sublist (str): The sublist to take configuration from.
-        year (str): The year to use for the sublist.
+        year (int): The year to use for the sublist.
 
     Returns:
-        list: A list of tuples, where each tuple contains the name and additional
-              information of a person.
+        tuple: The list of names, the list of mails in the same order, the list
+               of names having unwanted targets and the list of their unwanted
+               targets in the same order.
     """
     input_file = os.path.join(private_folder, config_sublist, people_list)
-    input_sublist = (
-        config_sublist if config_sublist == DEFAULT_SUBLIST else f"year_{year}"
-    )
+    input_sublist = get_sublist_key(config_sublist, year)
 
-    with open(input_file, "r", encoding="utf-8") as info:
-        dict_info_people = yaml.load(info).get(input_sublist, {})
+    dict_info_people = (_load_yaml_cached(input_file) or {}).get(input_sublist, {})
 
     if not dict_info_people:
         logging.error("List of people is empty.")
-        return [], []
+        return [], [], [], []
 
     unwanted_people = dict_info_people.pop("unwanted", {})
-    return list(dict_info_people.items()), list(unwanted_people.items())
+    return (
+        list(dict_info_people),
+        list(dict_info_people.values()),
+        list(unwanted_people),
+        list(unwanted_people.values()),
+    )
 
 
 def compute_all_possibilities(
-    private_folder: str, config_sublist: str, nb_years: int
-) -> list:
+    private_folder: str,
+    config_sublist: str,
+    nb_years: int,
+    current_year: int,
+    names: list,
+    unwanted_names: list,
+    unwanted_targets: list,
+) -> set:
     """
     Compute possible pairs from all the possibilities and removing unwanted ones:
     - Same as old ones
@@ -180,208 +241,313 @@ def compute_all_possibilities(
                               and output files.
         config_sublist (str): The sublist to take configuration from.
         nb_years (int): The number of years to consider when shuffling the list.
+        current_year (int): The year the list is computed for.
+        names (list): The names of the people taking part this year.
+        unwanted_names (list): The names of the people having unwanted targets.
+        unwanted_targets (list): The unwanted targets of these people, in the
+                                 same order.
 
     Returns:
-        list: A list with all the possible pairs without keeping the ones from
-              the X previous years and the unwanted ones.
+        set: A set with all the possible pairs without keeping the ones from
+             the X previous years and the unwanted ones.
     """
-    list_people, list_unwanted = get_people(
-        private_folder, "input_mail_list.yaml", config_sublist
-    )
-    names = [person[0] for person in list_people]
-    all_pairs = list(permutations(names, 2))
+    # Unwanted pairs and the pairs of the previous years, removed all at once
+    forbidden_pairs = {
+        (name, target)
+        for name, targets in zip(unwanted_names, unwanted_targets)
+        for target in targets
+    }
+
+    # All the years live in the same file, read it once
+    output_file = os.path.join(private_folder, config_sublist, "output_mail_list.yaml")
+    try:
+        old_years = _load_yaml_cached(output_file) or {}
+    except FileNotFoundError:
+        old_years = {}
 
-    current_year = datetime.now().year
     for i in range(nb_years):
-        old_list_people, _ = get_people(
-            private_folder,
-            "output_mail_list.yaml",
-            config_sublist,
-            year=current_year - i - 1,
-        )
-
-        old_pairs = [
-            (old_list_people[i][0], old_list_people[(i + 1) % len(old_list_people)][0])
-            for i, _ in enumerate(old_list_people)
-        ]
+        old_sublist = get_sublist_key(config_sublist, current_year - i - 1)
+        old_names = list(old_years.get(old_sublist) or {})
+        forbidden_pairs.update(zip(old_names, old_names[1:] + old_names[:1]))
 
-        all_pairs = [pair for pair in all_pairs if pair not in old_pairs]
-
-    unwanted_pairs = [
-        (unwanted[0], target) for unwanted in list_unwanted for target in unwanted[1]
-    ]
-    all_pairs = [pair for pair in all_pairs if pair not in unwanted_pairs]
+    all_pairs = set(permutations(names, 2))
+    all_pairs -= forbidden_pairs
 
     return all_pairs
 
 
-def get_santas_list(private_folder: str, config_sublist: str, nb_years: int) -> list:
+def get_santas_list(
+    private_folder: str, config_sublist: str, nb_years: int, current_year: int
+) -> tuple:
     """
-    Shuffle the list of people until no one has the same assigned person as
-    for the last nb_years of years or someone classified as unwanted.
+    Find a random order of people in which no one has the same assigned person
+    as for the last nb_years of years or someone classified as unwanted.
 
     Args:
         private_folder (str): The path to the private folder containing the input
                               and output files.
         config_sublist (str): The sublist to take configuration from.
         nb_years (int): The number of years to consider when shuffling the list.
+        current_year (int): The year the list is drawn for.
 
     Returns:
-        list: The shuffled list of people.
+        tuple: The shuffled list of names and the list of their mails.
     """
-    list_people = get_people(private_folder, "input_mail_list.yaml", config_sublist)[0]
+    names, emails, unwanted_names, unwanted_targets = get_people(
+        private_folder, "input_mail_list.yaml", config_sublist, current_year
+    )
 
     answer = input("[Question] - Would you like to shuffle list ? [y/N] ")
-    if not answer.lower() == "y":
-        return list_people
+    if not answer.lower() == "y" or not names:
+        return names, emails
 
-    possible_list = compute_all_possibilities(private_folder, config_sublist, nb_years)
+    adjacency = {name: set() for name in names}
+    for santa, target in compute_all_possibilities(
+        private_folder,
+        config_sublist,
+        nb_years,
+        current_year,
+        names,
+        unwanted_names,
+        unwanted_targets,
+    ):
+        adjacency[santa].add(target)
 
-    for _ in range(MAX_ITERATION):
-        random.shuffle(possible_list)
+    list_santas = []
+    if _check_santas_graph(adjacency):
+        list_santas = _find_santas_cycle(adjacency, _rng.choice(names))
 
-        list_santas = []
-        list_filtered = possible_list.copy()
-        santa, next_santa = list_filtered[0]
+    if not list_santas:
+        logging.error("Could not shuffle list with the current conditions.")
+        sys.exit(1)
 
-        for _, _ in enumerate(list_people):
-            list_santas.append(
-                next((person for person in list_people if person[0] == santa), None)
-            )
-            list_filtered = [pair for pair in list_filtered if santa not in pair]
+    by_name = dict(zip(names, emails))
+    return list_santas, [by_name[santa] for santa in list_santas]
 
-            santa = next_santa
-            next_santa = next(
-                (person[1] for person in list_filtered if person[0] == santa),
-                None,
-            )
 
-            if not santa:
-                break
+def _check_santas_graph(adjacency: dict) -> bool:
+    """
+    Check conditions every valid order needs, to fail fast instead of searching
+    in vain: everyone has someone to give to and someone to receive from, and
+    everyone can be reached from everyone through allowed pairs.
 
-        if len(list_santas) == len(list_people):
-            return list_santas
+    Args:
+        adjacency (dict): The set of allowed targets for each person.
 
-    logging.error("Could not shuffle list with the current conditions.")
-    sys.exit(1)
+    Returns:
+        bool: False, after logging why, if no valid order can exist.
+    """
+    givers = {name: set() for name in adjacency}
+    for santa, targets in adjacency.items():
+        for target in targets:
+            givers[target].add(santa)
+
+    for name in adjacency:
+        if not adjacency[name]:
+            logging.error("%s cannot give to anyone.", name)
+            return False
+
+        if not givers[name]:
+            logging.error("Nobody can give to %s.", name)
+            return False
+
+    # A single strongly connected component: reaching everyone from someone,
+    # following the pairs forward and backward
+    start = next(iter(adjacency))
+    for graph in (adjacency, givers):
+        reached = {start}
+        stack = [start]
+        while stack:
+            for name in graph[stack.pop()] - reached:
+                reached.add(name)
+                stack.append(name)
+
+        if len(reached) < len(adjacency):
+            logging.error("People cannot all be chained through allowed pairs.")
+            return False
+
+    return True
+
+
+def _find_santas_cycle(adjacency: dict, start: str) -> list:
+    """
+    Search, by depth-first search with backtracking, an order going through
+    every person once in which each person can give to the next one and the
+    last one to the first one. The search keeps its own stack rather than
+    recursing, so that large lists do not hit the recursion limit.
+
+    Args:
+        adjacency (dict): The set of allowed targets for each person.
+        start (str): The name of the person to start the order from.
+
+    Returns:
+        list: The names in order, or an empty list if there is no such order.
+    """
+    path = [start]
+    visited = {start}
+
+    def candidates(name: str):
+        targets = list(adjacency[name] - visited)
+        _rng.shuffle(targets)
+
+        # Try first the people with the fewest targets left (Warnsdorff's rule)
+        targets.sort(key=lambda target: len(adjacency[target] - visited))
+        return iter(targets)
+
+    stack = [candidates(start)]
+    while stack:
+        if len(path) == len(adjacency) and start in adjacency[path[-1]]:
+            return path
+
+        name = next(stack[-1], None)
+        if name is None:
+            stack.pop()
+            visited.remove(path.pop())
+            continue
+
+        path.append(name)
+        visited.add(name)
+        stack.append(candidates(name))
+
+    return []
 
 
-def save_people(list_people: list, output_file: str):
+def save_people(names: list, emails: list, output_file: str, current_year: int):
     """
     Save the list of people into the output file in a certain yaml format.
 
     Args:
-        list_people (list): A list of tuples, where each tuple contains the name
-                            and additional information of a person.
+        names (list): The names of the people, in santas order.
+        emails (list): The mails of the people, in the same order.
         output_file (str): The path to the output file where the list of people
                            will be saved.
+        current_year (int): The year to save the list of people under.
     """
-    current_year = datetime.now().year
+    new_entry = {f"year_{current_year}": dict(zip(names, emails))}
 
     try:
-        with open(output_file, "r", encoding="utf-8") as file:
-            data = yaml.load(file) or {}
+        old_years = _load_yaml_cached(output_file)
     except FileNotFoundError:
-        data = {}
+        old_years = None
 
-    new_entry = {f"year_{current_year}": dict(list_people)}
-    data.update(new_entry)
+    # A new year only needs its section appended after the previous ones, which
+    # are already formatted, instead of rewriting the whole file
+    if old_years and f"year_{current_year}" not in old_years:
+        stream = StringIO()
+        yaml.dump(new_entry, stream)
 
-    stream = StringIO()
-    yaml.dump(data, stream)
-    yaml_str = stream.getvalue()
+        with open(output_file, "rb+") as file:
+            file.seek(-1, os.SEEK_END)
+            separator = "\n" if file.read(1) == b"\n" else "\n\n"
+            file.write((separator + stream.getvalue().rstrip()).encode("utf-8"))
 
-    sections = yaml_str.split("\n")
-    formatted_sections = []
+        return
 
-    for section in sections:
-        if section == "":
-            continue
+    try:
+        file = open(output_file, "r+", buffering=IO_BUFFER_SIZE, encoding="utf-8")
+    except FileNotFoundError:
+        file = open(output_file, "w+", buffering=IO_BUFFER_SIZE, encoding="utf-8")
+
+    # Read and rewrite through the same handle, the file is only truncated once
+    # the new content is fully dumped
+    with file:
+        data = yaml.load(file) or {}
+        data.update(new_entry)
+
+        stream = StringIO()
+        yaml.dump(data, stream)
+        yaml_str = stream.getvalue()
 
-        if re.compile(r"^[a-zA-Z0-9_-]+:").match(section):
-            formatted_sections.append("\n")
+        file.seek(0)
+        file.truncate()
 
-        formatted_sections.append(section + "\n")
-    formatted_yaml_str = "".join(formatted_sections).strip()
+        separator = ""
+        for section in yaml_str.splitlines():
+            if not section:
+                continue
 
-    with open(output_file, "w", encoding="utf-8") as file:
-        file.write(formatted_yaml_str)
+            # Separate top-level sections with a blank line
+            if separator and SECTION_RE.match(section):
+                file.write(separator)
 
+            file.write(separator + section)
+            separator = "\n"
 
-def get_credentials(timeout: int, smtp_server: str, port: int) -> tuple:
+
+def get_credentials(timeout: int, smtp_server: str, port: int, context) -> tuple:
     """
-    Prompts the user for email and password securely.
+    Prompts the user for email and password securely, until they can log in to
+    the SMTP server or MAX_LOGIN_ATTEMPTS attempts failed. The connection is kept
+    across attempts, so a mistyped password does not cost a new TLS handshake.
 
     Args:
         timeout (int): The timeout to use for the SMTP connection.
         smtp_server (str): The SMTP server address.
         port (int): The port to use for the SMTP server.
+        context (ssl.SSLContext): The SSL context to use for the connection.
 
     Returns:
-        tuple: The email and password entered by the user.
+        tuple: The email and password entered by the user, and the SMTP
+               connection logged in with them.
     """
-    login = input("[Question] - Type your user mail login and press enter: ")
-    password = getpass.getpass("[Question] - Type your password and press enter: ")
+    # Mail modules are only imported once mails are actually sent
+    import smtplib
+    import socket
 
-    if not check_credentials(timeout, smtp_server, port, login, password):
-        return get_credentials(timeout, smtp_server, port)
+    server = None
+    for _ in range(MAX_LOGIN_ATTEMPTS):
+        login = input("[Question] - Type your user mail login and press enter: ")
+        password = getpass.getpass("[Question] - Type your password and press enter: ")
 
-    return login, password
+        try:
+            if server is None:
+                server = smtplib.SMTP_SSL(
+                    smtp_server, port, context=context, timeout=timeout
+                )
 
+            server.login(login, password)
+            return login, password, server
+        except smtplib.SMTPAuthenticationError:
+            logging.error(
+                "Authentication error. Please check your credentials and try again."
+            )
+            continue
+        except socket.timeout:
+            logging.error(
+                "Connection timed out. Please check your network connection and try again."
+            )
+        except socket.gaierror:
+            logging.error(
+                "Network error. Please check your internet connection and the SMTP server address."
+            )
+        except smtplib.SMTPException as error:
+            logging.error("SMTP error occurred: %s", error)
 
-def check_credentials(
-    timeout: int, smtp_server: str, port: int, login: str, password: str
-) -> bool:
-    """
-    Checks if the provided login and password are valid by attempting to log in to the SMTP server.
+        # Only a wrong password leaves the connection usable for another attempt
+        if server is not None:
+            server.close()
+            server = None
 
-    Args:
-        timeout (int): The timeout to use for the SMTP connection.
-        smtp_server (str): The SMTP server address.
-        port (int): The port to use for the SMTP server.
-        login (str): The login to log in with.
-        password (str): The password to log in with.
+    if server is not None:
+        server.close()
 
-    Returns:
-        bool: True if the credentials are valid, False otherwise.
-    """
-    context = ssl.create_default_context()
+    logging.error("Could not log in after %d attempts.", MAX_LOGIN_ATTEMPTS)
+    sys.exit(1)
 
-    try:
-        with smtplib.SMTP_SSL(
-            smtp_server, port, context=context, timeout=timeout
-        ) as server:
-            server.login(login, password)
-        return True
-    except smtplib.SMTPAuthenticationError:
-        logging.error(
-            "Authentication error. Please check your credentials and try again."
-        )
-        return False
-    except socket.timeout:
-        logging.error(
-            "Connection timed out. Please check your network connection and try again."
-        )
-        return False
-    except socket.gaierror:
-        logging.error(
-            "Network error. Please check your internet connection and the SMTP server address."
-        )
-        return False
-    except smtplib.SMTPException as error:
-        logging.error("SMTP error occurred: %s", error)
-        return False
-
-
-def generate_pdf(file_path: str, list_people: list, title: str):
+
+def generate_pdf(file_path: str, names: list, title: str):
     """
     Create a simple PDF with the given text.
 
     Args:
         file_path (str): The path to save the PDF file.
-        list_people (list): The generated list for the secret santa.
+        names (list): The names of the generated list for the secret santa.
         title (str): Title of the generated pdf
     """
+    # reportlab is slow to import, only pay for it when a PDF is generated
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
     pdf_title = title.replace(" ", "_")
     filename = os.path.join(file_path, f"{pdf_title}.pdf")
 
@@ -399,49 +565,148 @@ def generate_pdf(file_path: str, list_people: list, title: str):
     arrow_unicode = "\u279F"
     output_pdf.setFont("Helvetica", FONT_SIZE_TEXT)
 
-    for i in range(len(list_people) - 1):
-        text = f"{list_people[i][0]} {arrow_unicode} {list_people[i + 1][0]}"
-        output_pdf.drawString(100, height - (i + 1) * 1.5 * FONT_SIZE_TEXT - 100, text)
+    text = output_pdf.beginText(100, height - 1.5 * FONT_SIZE_TEXT - 100)
+    text.setLeading(1.5 * FONT_SIZE_TEXT)
 
+    for i in range(len(names) - 1):
+        text.textLine(f"{names[i]} {arrow_unicode} {names[i + 1]}")
+
+    output_pdf.drawText(text)
     output_pdf.save()
 
 
-def send_email(list_people: list, private_config: dict, config_sublist: str):
+def open_smtp(smtp_server: str, port: int, context, login: str, password: str):
+    """
+    Opens an SSL connection to the SMTP server and logs in.
+
+    Args:
+        smtp_server (str): The SMTP server address.
+        port (int): The port to use for the SMTP server.
+        context (ssl.SSLContext): The SSL context to use for the connection.
+        login (str): The login to log in with.
+        password (str): The password to log in with.
+
+    Returns:
+        smtplib.SMTP_SSL: The logged in connection.
+    """
+    # Mail modules are only imported once mails are actually sent
+    import smtplib
+
+    server = smtplib.SMTP_SSL(smtp_server, port, context=context)
+    try:
+        server.login(login, password)
+    except OSError:
+        server.close()
+        raise
+
+    return server
+
+
+def send_email(names: list, emails: list, private_config: dict, config_sublist: str):
     """
     Sends an email using the specified SMTP server and port.
 
     Args:
-        list_people (list): A list of tuples, where each tuple contains the name
-                            and additional information of a person.
+        names (list): The names of the people, in santas order.
+        emails (list): The mails of the people, in the same order.
         private_config (dict): The private configuration loaded from the private
                                configuration file.
         config_sublist (str): The sublist to take configuration from.
     """
-    param_mail_body = private_config[config_sublist]["mail_body"]
-    login, password = get_credentials(
-        private_config["timeout"], private_config["smtp_server"], private_config["port"]
+    # Mail modules are only imported once mails are actually sent
+    import queue
+    import smtplib
+    import ssl
+    from concurrent.futures import ThreadPoolExecutor
+    from email.mime.text import MIMEText
+
+    sublist_config = private_config[config_sublist]
+    subject = sublist_config["mail_subject"]
+    sender = private_config["mail_sender"]
+    smtp_server = private_config["smtp_server"]
+    port = private_config["port"]
+
+    # Turn the placeholders into format fields once, escaping literal braces
+    mail_template = (
+        sublist_config["mail_body"]
+        .replace("{", "{{")
+        .replace("}", "}}")
+        .replace("CFG_RECIPIENT", "{recipient}")
+        .replace("CFG_TARGET", "{target}")
+    )
+    # Loading the CA certificates is costly, share one context for all connections
+    context = ssl.create_default_context()
+    login, password, server = get_credentials(
+        private_config["timeout"], smtp_server, port, context
     )
 
-    for i, _ in enumerate(list_people):
-        santa = list_people[i]
-        santa_target = list_people[(i + 1) % len(list_people)]
-
-        mail_body = param_mail_body.replace("CFG_RECIPIENT", santa[0])
-        mail_body = mail_body.replace("CFG_TARGET", santa_target[0])
-
-        msg = MIMEMultipart()
-        msg.attach(MIMEText(mail_body, "plain"))
-
-        msg["Subject"] = private_config[config_sublist]["mail_subject"]
-        msg["From"] = private_config["mail_sender"]
-        msg["To"] = santa[1]
+    # Logged in connections waiting for a mail to send, with the number of mails
+    # they already sent. It starts with the one used to check the credentials
+    # and grows up to one connection per worker.
+    idle_servers = queue.Queue()
+    idle_servers.put((server, 0))
+    errors = []
+    lock = threading.Lock()
+    abort = threading.Event()
+
+    def send_one(name: str, mail: str, target: str):
+        if abort.is_set():
+            return
+
+        mail_body = mail_template.format(recipient=name, target=target)
+
+        msg = MIMEText(mail_body, "plain", "utf-8")
+        msg["Subject"] = subject
+        msg["From"] = sender
+        msg["To"] = mail
+
+        server, nb_sent, reusable = None, 0, False
+        try:
+            try:
+                server, nb_sent = idle_servers.get_nowait()
+            except queue.Empty:
+                server = open_smtp(smtp_server, port, context, login, password)
+
+            try:
+                server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server may drop a connection kept open, retry once on a new one
+                server.close()
+                server = open_smtp(smtp_server, port, context, login, password)
+                nb_sent = 0
+                server.send_message(msg)
+
+            nb_sent += 1
+            reusable = nb_sent < MAX_MAILS_PER_CONNECTION
+        except OSError as error:
+            logging.error("Could not send mail to %s: %s", name, error)
+
+            with lock:
+                errors.append(name)
+
+                # Stop before the SMTP server locks the account out
+                if len(errors) * MAX_ERROR_RATIO > len(names) and not abort.is_set():
+                    logging.error("Too many errors, aborting mail sending.")
+                    abort.set()
+        finally:
+            # Connections are recycled after a while or an error, servers limit
+            # the number of mails per connection
+            if reusable:
+                idle_servers.put((server, nb_sent))
+            elif server is not None:
+                with suppress(OSError):
+                    server.quit()
 
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL(
-            private_config["smtp_server"], private_config["port"], context=context
-        ) as server:
-            server.login(login, password)
-            server.sendmail(private_config["mail_sender"], santa[1], msg.as_string())
+    try:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(MAX_SEND_WORKERS, len(names)))
+        ) as executor:
+            # Everyone gives to the next person, the last one to the first one
+            list(executor.map(send_one, names, emails, names[1:] + names[:1]))
+    finally:
+        while not idle_servers.empty():
+            with suppress(OSError):
+                idle_servers.get_nowait()[0].quit()
 
 
 if __name__ == "__main__":